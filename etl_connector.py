@@ -6,27 +6,85 @@ Description:
 This script extracts data from multiple blocklist.de endpoints,
 validates responses, and loads structured IP data into MongoDB.
 It includes retry logic, rate limit handling, and MongoDB insertion validation.
+All endpoints are fetched concurrently with aiohttp + asyncio.
 """
 
 import os
+import re
 import time
+import asyncio
 import logging
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Tuple
 
-import requests
+import aiohttp
 from dotenv import load_dotenv
-from pymongo import MongoClient, errors
+from bson import ObjectId, encode
+from bson.raw_bson import RawBSONDocument
+from pymongo import MongoClient, InsertOne, WriteConcern, errors
 import ipaddress
 
-# ------------------ Load Environment Variables ------------------
-load_dotenv()
+# ------------------ Configuration ------------------
+@dataclass(frozen=True)
+class Config:
+    """Connector settings; build one explicitly or load them from the environment with get_config()."""
+    mongo_uri: Optional[str] = None
+    mongo_db: str = "ssn_blocklist"
+    timeout: int = 15
+    retries: int = 5
+    backoff: float = 1.5
+    rate_limit_rps: float = 1.0
+    # zstd/snappy need the optional python-zstandard/python-snappy packages; zlib always works
+    mongo_compressors: str = "zlib"
+    # Trade the conditional-GET safeguard for faster inserts; see UNACKNOWLEDGED_WRITE_CONCERN
+    unacknowledged_writes: bool = False
+    # One-off migration: let get_mongo_collection delete duplicates left by pre-index runs
+    dedupe_existing: bool = False
 
-MONGO_URI = os.getenv("MONGO_URI")
-MONGO_DB = os.getenv("MONGO_DB", "ssn_blocklist")
-REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "15"))
-MAX_RETRIES = int(os.getenv("MAX_RETRIES", "5"))
-BACKOFF_FACTOR = float(os.getenv("BACKOFF_FACTOR", "1.5"))
+    def __post_init__(self):
+        if self.rate_limit_rps <= 0:
+            raise ValueError(f"rate_limit_rps (RATE_LIMIT_RPS) must be positive, got {self.rate_limit_rps}")
+
+_TRUE_FLAGS = ("1", "true", "yes", "on")
+_FALSE_FLAGS = ("0", "false", "no", "off", "")
+
+def _parse_flag(value: str) -> bool:
+    """Parse a boolean setting; unknown values such as typos are rejected rather than read as false."""
+    value = value.strip().lower()
+    if value in _TRUE_FLAGS:
+        return True
+    if value in _FALSE_FLAGS:
+        return False
+    raise ValueError(f"expected one of {', '.join(_TRUE_FLAGS + _FALSE_FLAGS[:-1])}, got {value!r}")
+
+# Environment variable and parser for each Config field; unset variables keep the field default
+_ENV_SETTINGS = {
+    "mongo_uri": ("MONGO_URI", str),
+    "mongo_db": ("MONGO_DB", str),
+    "timeout": ("REQUEST_TIMEOUT", int),
+    "retries": ("MAX_RETRIES", int),
+    "backoff": ("BACKOFF_FACTOR", float),
+    "rate_limit_rps": ("RATE_LIMIT_RPS", float),
+    "mongo_compressors": ("MONGO_COMPRESSORS", str),
+    "unacknowledged_writes": ("UNACKNOWLEDGED_WRITES", _parse_flag),
+    "dedupe_existing": ("DEDUPE_EXISTING", _parse_flag),
+}
+
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Load .env and parse the environment once, on first use rather than at import."""
+    load_dotenv()
+    settings = {}
+    for field, (var, parse) in _ENV_SETTINGS.items():
+        if var not in os.environ:
+            continue
+        try:
+            settings[field] = parse(os.environ[var])
+        except ValueError as e:
+            raise ValueError(f"Invalid {var}: {e}") from e
+    return Config(**settings)
 
 # ------------------ Logging Setup ------------------
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
@@ -42,129 +100,449 @@ LIST_ENDPOINTS = {
     "bots": "https://lists.blocklist.de/lists/bots.txt",
 }
 
+# ------------------ Rate Limiting ------------------
+class RateLimiter:
+    """Async limiter keeping request starts at most ``rps`` per second; sleeps only when over budget."""
+
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps
+        self.last = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            delta = self.interval - (time.monotonic() - self.last)
+            if delta > 0:
+                await asyncio.sleep(delta)
+            self.last = time.monotonic()
+
+# ------------------ Conditional GET Helpers ------------------
+def _conditional_headers(etag: Optional[str] = None, last_mod: Optional[str] = None) -> Dict[str, str]:
+    """Build If-None-Match / If-Modified-Since headers from a previous response's validators."""
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_mod:
+        headers["If-Modified-Since"] = last_mod
+    return headers
+
+def response_validators(headers) -> Dict[str, Optional[str]]:
+    """Extract the ETag / Last-Modified validators to send on the next run."""
+    return {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+
 # ------------------ HTTP GET with Retry, Backoff & Rate Limit Handling ------------------
-def safe_get(url: str) -> requests.Response:
-    """Fetch data with retries, backoff, and rate-limit handling."""
-    session = requests.Session()
+async def fetch(session: aiohttp.ClientSession, url: str, etag: Optional[str] = None,
+                last_mod: Optional[str] = None, limiter: Optional[RateLimiter] = None,
+                config: Optional[Config] = None) -> Optional[Tuple[bytes, Dict[str, Optional[str]]]]:
+    """Fetch a list with retries, backoff, and rate-limit (429 / Retry-After) handling.
+
+    Returns (raw body bytes, validators), or None when the list is unchanged (304 Not Modified).
+    Pass the body bytes to parse_ip_list; it never needs decoding as a whole.
+    """
+    config = config or get_config()
     attempt = 0
+    timeout = aiohttp.ClientTimeout(total=config.timeout)
+    headers = _conditional_headers(etag, last_mod)
 
-    while attempt < MAX_RETRIES:
+    while attempt < config.retries:
+        if limiter is not None:
+            await limiter.wait()
         try:
-            resp = session.get(url, timeout=REQUEST_TIMEOUT)
-
-            # Check for HTTP 429 (rate limit)
-            if resp.status_code == 429:
-                retry_after = int(resp.headers.get("Retry-After", "10"))
-                logger.warning("Rate limit hit (429). Retrying after %ds", retry_after)
-                time.sleep(retry_after)
-                attempt += 1
-                continue
-
-            # Successful response
-            if resp.status_code == 200:
-                if not resp.text.strip():
-                    raise ValueError("Empty payload received.")
-                return resp
-
-            # Server-side errors (5xx)
-            elif 500 <= resp.status_code < 600:
-                attempt += 1
-                sleep_for = BACKOFF_FACTOR ** attempt
-                logger.warning("Server error %d — retrying in %.1fs", resp.status_code, sleep_for)
-                time.sleep(sleep_for)
-                continue
-
-            # Other HTTP errors
-            else:
-                logger.error("HTTP error %d for %s", resp.status_code, url)
-                resp.raise_for_status()
-
-        except requests.RequestException as e:
+            async with session.get(url, timeout=timeout, headers=headers) as resp:
+
+                # Unchanged since the last run: nothing to download, parse or insert
+                if resp.status == 304:
+                    return None
+
+                # Check for HTTP 429 (rate limit)
+                if resp.status == 429:
+                    retry_after = int(resp.headers.get("Retry-After", "10"))
+                    logger.warning("Rate limit hit (429). Retrying after %ds", retry_after)
+                    await asyncio.sleep(retry_after)
+                    attempt += 1
+                    continue
+
+                # Successful response: keep the raw bytes, the lists are plain ASCII
+                if resp.status == 200:
+                    body = await resp.read()
+                    if not body.strip():
+                        raise ValueError("Empty payload received.")
+                    return body, response_validators(resp.headers)
+
+                # Server-side errors (5xx)
+                elif 500 <= resp.status < 600:
+                    attempt += 1
+                    sleep_for = config.backoff ** attempt
+                    logger.warning("Server error %d — retrying in %.1fs", resp.status, sleep_for)
+                    await asyncio.sleep(sleep_for)
+                    continue
+
+                # Other HTTP errors
+                else:
+                    logger.error("HTTP error %d for %s", resp.status, url)
+                    resp.raise_for_status()
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             attempt += 1
-            if attempt >= MAX_RETRIES:
+            if attempt >= config.retries:
                 logger.error("Max retries reached for %s: %s", url, e)
                 raise
-            sleep_for = BACKOFF_FACTOR ** attempt
+            sleep_for = config.backoff ** attempt
             logger.warning("Request failed, retrying in %.1fs (attempt %d/%d): %s",
-                           sleep_for, attempt, MAX_RETRIES, e)
-            time.sleep(sleep_for)
+                           sleep_for, attempt, config.retries, e)
+            await asyncio.sleep(sleep_for)
 
-    raise RuntimeError(f"Failed to fetch {url} after {MAX_RETRIES} retries")
+    raise RuntimeError(f"Failed to fetch {url} after {config.retries} retries")
 
 # ------------------ Parse IP List ------------------
-def parse_ip_list(text: str, service: str) -> List[Dict[str, Any]]:
-    """Convert plain text IPs into structured MongoDB documents with validation."""
+# Dotted-quad with octets 0-255 and no leading zeros (the same rule ipaddress applies).
+# Range-checking inside the regex beats a loose \d{1,3} match followed by a per-octet
+# lookup in a frozenset of b"0"..b"255" (~1.6x slower) or int() (~3.5x slower).
+_OCTET = rb"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+# First token of every non-blank, non-comment line, in one C-level scan of the whole body:
+# group 1 is a valid IPv4 address, group 2 any other token (IPv6 candidate or junk).
+# A line starts wherever str.splitlines() would break (\n, \r, \v, \f) and is stripped like str.strip().
+_TOKEN_RE = re.compile(rb"(?<![^\n\r\v\f])[ \t\f\v]*(?:((?:%s\.){3}%s)(?=\s|\Z)|([^\s#]\S*))"
+                       % (_OCTET, _OCTET))
+
+def _is_ip_address(token: str) -> bool:
+    """Full ipaddress validation, used for the (rare) tokens that are not dotted-quads."""
+    try:
+        ipaddress.ip_address(token)
+    except ValueError:
+        return False
+    return True
+
+def parse_ip_list(content: bytes, service: str, fetched_at: Optional[datetime] = None,
+                  run_id: Optional[ObjectId] = None) -> Tuple[List[str], List[bytes]]:
+    """Validate a raw list body; return (valid IPs, their documents as encoded BSON bytes).
+
+    ``fetched_at`` / ``run_id`` stamp the run (first seen and initial last seen); both default to fresh values.
+    """
+    # Only "ip" varies per document; copying a prebuilt template is cheaper than a fresh dict literal
+    fetched_at = fetched_at or datetime.utcnow()
+    run_id = run_id or ObjectId()
+    base = {
+        "ip": None,
+        "service": service,
+        "source": "blocklist.de/lists",
+        "fetched_at": fetched_at,
+        "run_id": run_id,
+        "last_seen": fetched_at,
+        "last_run_id": run_id,
+    }
+    ips = []
     docs = []
-    now = datetime.utcnow()
+    seen = set()
+    invalid_count = 0
+    log_each_invalid = logger.isEnabledFor(logging.DEBUG)
+
+    for match in _TOKEN_RE.finditer(content):
+        ipv4, other = match.groups()
+        raw = ipv4 or other
 
-    for line in text.splitlines():
-        line = line.strip()
-        if not line or line.startswith("#"):
+        # IPv4 was already validated by the scan; only IPv6 candidates reach ipaddress
+        if ipv4 is None and not (b":" in raw and _is_ip_address(raw.decode("ascii", "replace"))):
+            # A mangled list could hold thousands of these; count every occurrence and warn once below
+            invalid_count += 1
+            if log_each_invalid:
+                logger.debug("Invalid IP '%s' skipped from %s", raw.decode("ascii", "replace"), service)
             continue
-        token = line.split()[0]
 
-        # Validate if the token is a valid IP address
-        try:
-            ipaddress.ip_address(token)
-        except ValueError:
-            logger.warning("Invalid IP '%s' skipped from %s", token, service)
+        # A list can repeat an address; emit each IP once per service
+        if raw in seen:
             continue
+        seen.add(raw)
+        token = raw.decode("ascii")
+
+        doc = base.copy()
+        doc["ip"] = token
+        ips.append(token)
+        docs.append(encode(doc))
 
-        docs.append({
-            "ip": token,
-            "service": service,
-            "source": "blocklist.de/lists",
-            "fetched_at": now,
-        })
-    return docs
+    if invalid_count:
+        logger.warning("Skipped %d invalid tokens from %s", invalid_count, service)
+    return ips, docs
 
 # ------------------ MongoDB Helpers ------------------
-def get_mongo_collection(connector_name: str):
-    """Connect to MongoDB and return collection."""
-    if not MONGO_URI:
+DUPLICATE_KEY_ERROR = 11000
+# bulk_write already frames inserts as OP_MSG document sequences, splitting them at the server's
+# maxMessageSizeBytes (48MB); match maxWriteBatchSize so each call fills whole messages.
+INSERT_BATCH_SIZE = 100_000
+# IPs / _ids per $in filter in update_many and delete_many: a few hundred KB per command,
+# far below the 16MB BSON limit, and short enough that one command never holds locks for long
+MATCH_BATCH_SIZE = 10_000
+# Opt-in (UNACKNOWLEDGED_WRITES) concern for the _raw collection: the driver returns as soon as a
+# batch is on the socket, but failed writes go unreported, so list validators are never saved with it.
+UNACKNOWLEDGED_WRITE_CONCERN = WriteConcern(w=0)
+
+@lru_cache(maxsize=None)
+def _mongo_client(config: Config) -> MongoClient:
+    if not config.mongo_uri:
         raise RuntimeError("MONGO_URI not set in environment (.env)")
-    client = MongoClient(MONGO_URI)
-    db = client[MONGO_DB]
-    return db[f"{connector_name}_raw"]
+    # Raw ingest docs are small and repetitive, so wire compression pays off;
+    # writes are acknowledged (w=1) so a failed list is not marked as stored, but not journaled,
+    # since the public lists can always be downloaded again.
+    return MongoClient(
+        config.mongo_uri,
+        compressors=config.mongo_compressors,
+        zlibCompressionLevel=3,
+        maxPoolSize=16,
+        w=1,
+        journal=False,
+    )
 
-def safe_insert_many(collection, docs: List[Dict[str, Any]]):
-    """Insert multiple documents safely with error handling."""
-    if not docs:
-        logger.info("No documents to insert for %s", collection.name)
-        return 0
+def get_mongo_client(config: Optional[Config] = None) -> MongoClient:
+    """Return the process-wide MongoClient for ``config``, creating it on first use."""
+    return _mongo_client(config or get_config())
+
+def _remove_duplicate_ips(collection) -> int:
+    """Keep only the oldest document per (ip, service); return how many extra copies were deleted."""
+    groups = collection.aggregate([
+        {"$group": {"_id": {"ip": "$ip", "service": "$service"}, "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ], allowDiskUse=True)
+    removed = 0
+    extra: List[ObjectId] = []
+    for group in groups:
+        extra.extend(sorted(group["ids"])[1:])
+        if len(extra) >= MATCH_BATCH_SIZE:
+            removed += collection.delete_many({"_id": {"$in": extra}}).deleted_count
+            extra = []
+    if extra:
+        removed += collection.delete_many({"_id": {"$in": extra}}).deleted_count
+    return removed
+
+def get_mongo_collection(connector_name: str, config: Optional[Config] = None):
+    """Connect to MongoDB and return collection.
+
+    Raises if the unique (ip, service) index cannot be built; inserts rely on it.
+    """
+    config = config or get_config()
+    db = get_mongo_client(config)[config.mongo_db]
+    collection = db[f"{connector_name}_raw"]
+
+    # One document per (ip, service): re-inserts are rejected as duplicate keys
+    keys = [("ip", 1), ("service", 1)]
     try:
-        res = collection.insert_many(docs, ordered=False)
-        inserted = len(res.inserted_ids)
-        logger.info("✅ Inserted %d valid IP documents into %s", inserted, collection.name)
-        return inserted
+        collection.create_index(keys, unique=True)
+    except errors.OperationFailure as e:
+        if e.code != DUPLICATE_KEY_ERROR:
+            raise
+        # Runs from before the index stored one document per IP per run; that history is not
+        # deleted without an explicit opt-in
+        if not config.dedupe_existing:
+            raise RuntimeError(
+                f"{collection.name} holds several documents per (ip, service) from runs before the "
+                "unique index existed, so the index cannot be built. Run once with DEDUPE_EXISTING=true "
+                "to keep only the oldest copy of each and delete the rest (back the collection up first "
+                "if you need that per-run history)."
+            ) from e
+        logger.warning("DEDUPE_EXISTING: removing duplicate (ip, service) documents from %s",
+                       collection.name)
+        removed = _remove_duplicate_ips(collection)
+        logger.info("Removed %d duplicate documents from %s", removed, collection.name)
+        collection.create_index(keys, unique=True)
+    return collection
+
+def get_meta_collection(connector_name: str, config: Optional[Config] = None):
+    """Return the collection holding per-URL ETag / Last-Modified validators."""
+    config = config or get_config()
+    return get_mongo_client(config)[config.mongo_db][f"{connector_name}_meta"]
+
+def _insert_batch(collection, batch: Sequence[bytes]) -> Tuple[int, int, int]:
+    """Insert one batch unordered ("insert if new"); return (inserted, skipped as already stored, failed).
+
+    With an unacknowledged write concern the server reports nothing back, so every document
+    sent counts as inserted.
+    """
+    # RawBSONDocument wraps the encoded bytes; PyMongo sends them unchanged
+    ops = [InsertOne(RawBSONDocument(raw)) for raw in batch]
+    acknowledged = collection.write_concern.acknowledged
+    try:
+        # PyMongo rejects bypass_document_validation on unacknowledged writes
+        res = collection.bulk_write(ops, ordered=False, bypass_document_validation=acknowledged)
+        if not res.acknowledged:
+            return len(batch), 0, 0
+        return res.inserted_count, 0, 0
     except errors.BulkWriteError as bwe:
         inserted = bwe.details.get("nInserted", 0)
-        logger.warning("Bulk write error: inserted %d before failure. Error: %s", inserted, str(bwe))
-        return inserted
+        write_errors = bwe.details.get("writeErrors", [])
+        duplicates = sum(1 for err in write_errors if err.get("code") == DUPLICATE_KEY_ERROR)
+        if duplicates < len(write_errors):
+            logger.warning("Bulk write error: inserted %d before failure. Error: %s", inserted, str(bwe))
+        return inserted, duplicates, len(write_errors) - duplicates
+
+def safe_insert_many(collection, docs: Sequence[bytes]) -> Tuple[int, bool]:
+    """Insert new BSON-encoded documents (as returned by parse_ip_list) safely with error handling.
+
+    The unique (ip, service) index turns re-inserts of stored IPs into skipped duplicates, and
+    documents are sent in INSERT_BATCH_SIZE batches; the driver packs each into full wire messages.
+    Writes use the collection's write concern; when that is unacknowledged, duplicates are dropped
+    server-side unreported and the count is of documents sent.
+    Returns (inserted, complete) where complete is False if any document failed to store.
+    """
+    if not docs:
+        logger.info("No documents to insert for %s", collection.name)
+        return 0, True
+
+    inserted = skipped = failed = 0
+    try:
+        for start in range(0, len(docs), INSERT_BATCH_SIZE):
+            batch = docs[start:start + INSERT_BATCH_SIZE]
+            batch_inserted, batch_skipped, batch_failed = _insert_batch(collection, batch)
+            inserted += batch_inserted
+            skipped += batch_skipped
+            failed += batch_failed
     except Exception as e:
         logger.error("MongoDB insert failed: %s", e)
-        return 0
+        return inserted, False
+
+    if skipped:
+        logger.info("Skipped %d IPs already stored in %s", skipped, collection.name)
+    if not collection.write_concern.acknowledged:
+        logger.info("✅ Sent %d valid IP documents to %s (unacknowledged)", inserted, collection.name)
+    else:
+        logger.info("✅ Inserted %d valid IP documents into %s", inserted, collection.name)
+    return inserted, not failed
+
+def mark_listed(collection, service: str, ips: Sequence[str], run_ts: datetime, run_id: ObjectId) -> bool:
+    """Stamp last_seen / last_run_id on the stored documents of every IP in this run's download.
+
+    Inserts never touch IPs that are already stored, so this is what keeps last_seen current.
+    Returns False if the update failed.
+    """
+    try:
+        for start in range(0, len(ips), MATCH_BATCH_SIZE):
+            collection.update_many(
+                {"ip": {"$in": ips[start:start + MATCH_BATCH_SIZE]}, "service": service},
+                {"$set": {"last_seen": run_ts, "last_run_id": run_id}},
+            )
+    except Exception as e:
+        logger.error("Could not update last_seen for %s: %s", service, e)
+        return False
+    return True
+
+def load_validators(meta, urls: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Return the validators stored by previous runs, keyed by URL."""
+    return {doc["url"]: doc for doc in meta.find({"url": {"$in": list(urls)}})}
+
+def save_validators(meta, url: str, service: str, validators: Dict[str, Optional[str]], run_id: ObjectId):
+    """Remember a list's validators so the next run can send a conditional GET.
+
+    ``last_run_id`` is the run that last downloaded the list: the IPs it currently holds are the
+    documents with this ``service`` and that last_run_id, even after later runs skip it as unchanged.
+    """
+    meta.update_one(
+        {"url": url},
+        {"$set": {**validators, "service": service, "last_run_id": run_id, "updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
 
 # ------------------ Main ETL Workflow ------------------
-def run_lists_connector():
-    """Fetch, validate, and insert all blocklist services."""
-    collection = get_mongo_collection("blocklist_lists")
+# Parsed lists waiting for the insert consumer; bounds memory if MongoDB falls behind the downloads
+PIPELINE_QUEUE_SIZE = 4
+
+async def produce_list(session: aiohttp.ClientSession, limiter: RateLimiter, queue: asyncio.Queue,
+                       service: str, url: str, previous: Dict[str, Any],
+                       run_ts: datetime, run_id: ObjectId, config: Config):
+    """Fetch and parse one blocklist service, then hand its documents to the insert consumer."""
+    logger.info("🔹 Fetching list for '%s' from %s", service, url)
+    try:
+        result = await fetch(session, url, previous.get("etag"), previous.get("last_modified"), limiter, config)
+    except Exception as e:
+        logger.error("Failed to fetch %s: %s", url, e)
+        return
+
+    if result is None:
+        logger.info("List for '%s' unchanged since last run (304), skipping", service)
+        return
+    body, validators = result
+
+    # Keep the event loop free for the other downloads. A process pool measured slower end to end:
+    # starting its workers (~1.7s) outweighs parsing six lists of 30k lines (~0.6s)
+    try:
+        ips, docs = await asyncio.to_thread(parse_ip_list, body, service, run_ts, run_id)
+    except Exception as e:
+        logger.error("Failed to parse %s: %s", url, e)
+        return
+    await queue.put((service, url, ips, docs, validators))
+
+async def consume_lists(queue: asyncio.Queue, collection, meta, run_ts: datetime, run_id: ObjectId) -> int:
+    """Insert parsed lists from the queue until the None sentinel; return the total inserted."""
     total = 0
+    while True:
+        item = await queue.get()
+        if item is None:
+            return total
+        service, url, ips, docs, validators = item
+
+        # PyMongo is blocking (and thread-safe); keep the event loop free for the downloads
+        inserted, complete = await asyncio.to_thread(safe_insert_many, collection, docs)
+        total += inserted
+        # Freshly inserted documents already carry this run as last_seen; only stamp the list
+        # when some of its IPs were stored by earlier runs (or the writes were not acknowledged)
+        if complete and not (collection.write_concern.acknowledged and inserted == len(docs)):
+            complete = await asyncio.to_thread(mark_listed, collection, service, ips, run_ts, run_id)
+        # Only trust the validators once the whole list is known to be stored, or a failed run would
+        # be skipped next time; unacknowledged writes never confirm that
+        if complete and collection.write_concern.acknowledged:
+            try:
+                await asyncio.to_thread(save_validators, meta, url, service, validators, run_id)
+            except Exception as e:
+                logger.warning("Could not save validators for %s: %s", url, e)
+
+async def main_async(collection, meta, run_ts: datetime, run_id: ObjectId,
+                     config: Optional[Config] = None) -> int:
+    """Download all blocklist services concurrently and return the total inserted.
 
-    for service, url in LIST_ENDPOINTS.items():
-        logger.info("🔹 Fetching list for '%s' from %s", service, url)
+    Downloads and parsing (producers, parsing in worker threads) overlap with MongoDB inserts
+    (a single consumer).
+    """
+    config = config or get_config()
+    previous = await asyncio.to_thread(load_validators, meta, LIST_ENDPOINTS.values())
+    queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+
+    # Every list lives on the same host, so the per-host limit must admit all of them
+    connector = aiohttp.TCPConnector(limit=len(LIST_ENDPOINTS), limit_per_host=len(LIST_ENDPOINTS))
+    # Polite request pacing replaces the old fixed sleep between endpoints
+    limiter = RateLimiter(config.rate_limit_rps)
+
+    async def produce_all():
         try:
-            resp = safe_get(url)
-        except Exception as e:
-            logger.error("Failed to fetch %s: %s", url, e)
-            continue
+            async with aiohttp.ClientSession(connector=connector) as session:
+                await asyncio.gather(*[
+                    produce_list(session, limiter, queue, service, url, previous.get(url, {}),
+                                 run_ts, run_id, config)
+                    for service, url in LIST_ENDPOINTS.items()
+                ])
+        finally:
+            await queue.put(None)
 
-        docs = parse_ip_list(resp.text, service)
-        inserted = safe_insert_many(collection, docs)
-        total += inserted
-        time.sleep(1)  # polite delay between API calls
+    _, total = await asyncio.gather(produce_all(), consume_lists(queue, collection, meta, run_ts, run_id))
+    return total
 
-    logger.info("🎯 Total valid IPs inserted from all lists: %d", total)
+def run_lists_connector(config: Optional[Config] = None):
+    """Fetch, validate, and insert all blocklist services (settings default to get_config())."""
+    config = config or get_config()
+    collection = get_mongo_collection("blocklist_lists", config)
+    meta = get_meta_collection("blocklist_lists", config)
+    if config.unacknowledged_writes:
+        collection = collection.with_options(write_concern=UNACKNOWLEDGED_WRITE_CONCERN)
+        # Validators saved by earlier acknowledged runs are still sent, so lists unchanged since then
+        # still answer 304; this run never saves validators or a list's last_run_id
+        logger.warning("Unacknowledged writes: lists are not recorded as stored (validators, last_run_id); "
+                       "lists changed since the last acknowledged run are downloaded again on every run")
+    # One timestamp and id for this run: first-seen fields of new IPs, last_seen of every listed IP
+    run_ts = datetime.utcnow()
+    run_id = ObjectId()
+    logger.info("Run id %s", run_id)
+    total = asyncio.run(main_async(collection, meta, run_ts, run_id, config))
+    if config.unacknowledged_writes:
+        logger.info("🎯 Total IP documents sent from all lists (unacknowledged, includes IPs already stored): %d",
+                    total)
+    else:
+        logger.info("🎯 Total new IPs inserted from all lists: %d", total)
 
 # ------------------ Main Entry ------------------
 def main():
@@ -0,0 +1,91 @@
+import pytest
+
+import etl_connector
+from etl_connector import Config, _ENV_SETTINGS, _parse_flag, get_config
+
+
+@pytest.fixture
+def env(monkeypatch):
+    """A clean environment: no settings variables and no .env file."""
+    for var, _ in _ENV_SETTINGS.values():
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setattr(etl_connector, "load_dotenv", lambda: None)
+    get_config.cache_clear()
+    yield monkeypatch
+    get_config.cache_clear()
+
+
+def test_unset_variables_keep_field_defaults(env):
+    assert get_config() == Config()
+
+
+def test_parses_environment(env):
+    env.setenv("MONGO_URI", "mongodb://db:27017")
+    env.setenv("MONGO_DB", "feeds")
+    env.setenv("REQUEST_TIMEOUT", "30")
+    env.setenv("MAX_RETRIES", "2")
+    env.setenv("BACKOFF_FACTOR", "2.5")
+    env.setenv("RATE_LIMIT_RPS", "0.5")
+    env.setenv("MONGO_COMPRESSORS", "zstd,zlib")
+    env.setenv("UNACKNOWLEDGED_WRITES", "true")
+    env.setenv("DEDUPE_EXISTING", "1")
+    assert get_config() == Config(
+        mongo_uri="mongodb://db:27017",
+        mongo_db="feeds",
+        timeout=30,
+        retries=2,
+        backoff=2.5,
+        rate_limit_rps=0.5,
+        mongo_compressors="zstd,zlib",
+        unacknowledged_writes=True,
+        dedupe_existing=True,
+    )
+
+
+def test_partial_environment(env):
+    env.setenv("REQUEST_TIMEOUT", "5")
+    assert get_config() == Config(timeout=5)
+
+
+def test_config_is_cached(env):
+    assert get_config() is get_config()
+
+
+@pytest.mark.parametrize("rps", [0, -1])
+def test_rejects_non_positive_rate_limit(rps):
+    with pytest.raises(ValueError, match="RATE_LIMIT_RPS"):
+        Config(rate_limit_rps=rps)
+
+
+def test_rejects_zero_rate_limit_from_environment(env):
+    env.setenv("RATE_LIMIT_RPS", "0")
+    with pytest.raises(ValueError, match="RATE_LIMIT_RPS"):
+        get_config()
+
+
+def test_invalid_number_names_the_variable(env):
+    env.setenv("MAX_RETRIES", "five")
+    with pytest.raises(ValueError, match="Invalid MAX_RETRIES"):
+        get_config()
+
+
+@pytest.mark.parametrize("value", ["1", "true", "True", " YES ", "on"])
+def test_parse_flag_true(value):
+    assert _parse_flag(value) is True
+
+
+@pytest.mark.parametrize("value", ["0", "false", "No", "off", ""])
+def test_parse_flag_false(value):
+    assert _parse_flag(value) is False
+
+
+@pytest.mark.parametrize("value", ["ture", "2", "enabled"])
+def test_parse_flag_rejects_unknown_values(value):
+    with pytest.raises(ValueError):
+        _parse_flag(value)
+
+
+def test_flag_typo_in_environment_is_an_error(env):
+    env.setenv("UNACKNOWLEDGED_WRITES", "ture")
+    with pytest.raises(ValueError, match="Invalid UNACKNOWLEDGED_WRITES"):
+        get_config()
@@ -0,0 +1,109 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from etl_connector import Config, _conditional_headers, fetch, response_validators
+
+CONFIG = Config(retries=3, backoff=1.5)
+BODY = b"1.2.3.4\n5.6.7.8\n"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record asyncio.sleep delays instead of waiting them out."""
+    recorded = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args, **kwargs):
+        recorded.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    return recorded
+
+
+def run_fetch(responses, **kwargs):
+    """Serve ``responses`` in order, call fetch once, and return (result, request headers seen)."""
+    seen = []
+    responses = iter(responses)
+
+    async def handler(request):
+        seen.append(dict(request.headers))
+        return next(responses)()
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/list.txt", handler)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            async with aiohttp.ClientSession() as session:
+                return await fetch(session, str(server.make_url("/list.txt")), config=CONFIG, **kwargs)
+        finally:
+            await server.close()
+
+    return asyncio.run(main()), seen
+
+
+def ok():
+    return web.Response(body=BODY, headers={"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"})
+
+
+def test_conditional_headers():
+    assert _conditional_headers() == {}
+    assert _conditional_headers('"v1"') == {"If-None-Match": '"v1"'}
+    assert _conditional_headers(last_mod="Wed, 01 Jan 2025 00:00:00 GMT") == {
+        "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"}
+    assert _conditional_headers('"v1"', "Wed, 01 Jan 2025 00:00:00 GMT") == {
+        "If-None-Match": '"v1"', "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT"}
+
+
+def test_response_validators():
+    assert response_validators({"ETag": '"v1"', "Last-Modified": "x"}) == {"etag": '"v1"', "last_modified": "x"}
+    assert response_validators({}) == {"etag": None, "last_modified": None}
+
+
+def test_fetch_returns_body_and_validators():
+    result, seen = run_fetch([ok])
+    assert result == (BODY, {"etag": '"v1"', "last_modified": "Wed, 01 Jan 2025 00:00:00 GMT"})
+    assert "If-None-Match" not in seen[0]
+
+
+def test_fetch_sends_validators_and_returns_none_on_304():
+    result, seen = run_fetch([lambda: web.Response(status=304)], etag='"v1"', last_mod="Wed, 01 Jan 2025 00:00:00 GMT")
+    assert result is None
+    assert seen[0]["If-None-Match"] == '"v1"'
+    assert seen[0]["If-Modified-Since"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+def test_fetch_waits_retry_after_on_429(sleeps):
+    result, seen = run_fetch([lambda: web.Response(status=429, headers={"Retry-After": "7"}), ok])
+    assert result[0] == BODY
+    assert len(seen) == 2
+    assert 7 in sleeps
+
+
+def test_fetch_backs_off_on_5xx(sleeps):
+    result, seen = run_fetch([lambda: web.Response(status=503), ok])
+    assert result[0] == BODY
+    assert len(seen) == 2
+    assert 1.5 in sleeps
+
+
+def test_fetch_gives_up_after_retries(sleeps):
+    with pytest.raises(RuntimeError, match="after 3 retries"):
+        run_fetch([lambda: web.Response(status=503)] * 3)
+
+
+def test_fetch_raises_on_client_error(sleeps):
+    # raise_for_status errors are ClientErrors, so they are retried like network errors
+    with pytest.raises(aiohttp.ClientResponseError):
+        run_fetch([lambda: web.Response(status=404)] * 3)
+
+
+def test_fetch_rejects_empty_body():
+    with pytest.raises(ValueError, match="Empty payload"):
+        run_fetch([lambda: web.Response(body=b"\n")])
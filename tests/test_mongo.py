@@ -0,0 +1,64 @@
+import pytest
+from bson import ObjectId
+
+import etl_connector
+from etl_connector import Config, _remove_duplicate_ips, get_mongo_collection
+
+mongomock = pytest.importorskip("mongomock")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(etl_connector, "_mongo_client", lambda config: client)
+    return client
+
+
+def baseline_docs():
+    """Two runs' worth of per-run copies, as written before the unique index existed."""
+    first, second = ObjectId(), ObjectId()
+    return [
+        {"_id": first, "ip": "1.2.3.4", "service": "ssh"},
+        {"_id": ObjectId(), "ip": "5.6.7.8", "service": "ssh"},
+        {"_id": ObjectId(), "ip": "1.2.3.4", "service": "mail"},
+        {"_id": second, "ip": "1.2.3.4", "service": "ssh"},
+        {"_id": ObjectId(), "ip": "1.2.3.4", "service": "ssh"},
+    ], first
+
+
+def test_remove_duplicate_ips_keeps_oldest_per_ip_and_service():
+    collection = mongomock.MongoClient().db.raw
+    docs, oldest = baseline_docs()
+    # Insert newest first so the natural order does not happen to match _id order
+    collection.insert_many(list(reversed(docs)))
+
+    assert _remove_duplicate_ips(collection) == 2
+    remaining = {(d["ip"], d["service"]): d["_id"] for d in collection.find()}
+    assert len(remaining) == collection.count_documents({}) == 3
+    assert remaining[("1.2.3.4", "ssh")] == oldest
+
+
+def test_remove_duplicate_ips_without_duplicates():
+    collection = mongomock.MongoClient().db.raw
+    collection.insert_many([{"ip": "1.2.3.4", "service": "ssh"}, {"ip": "1.2.3.4", "service": "mail"}])
+    assert _remove_duplicate_ips(collection) == 0
+    assert collection.count_documents({}) == 2
+
+
+def test_get_mongo_collection_refuses_to_dedupe_by_default(client):
+    docs, _ = baseline_docs()
+    client.ssn_blocklist.t_raw.insert_many(docs)
+
+    with pytest.raises(RuntimeError, match="DEDUPE_EXISTING=true"):
+        get_mongo_collection("t", Config(mongo_uri="mongodb://test"))
+    assert client.ssn_blocklist.t_raw.count_documents({}) == len(docs)
+
+
+def test_get_mongo_collection_dedupes_when_asked(client):
+    docs, oldest = baseline_docs()
+    client.ssn_blocklist.t_raw.insert_many(docs)
+
+    collection = get_mongo_collection("t", Config(mongo_uri="mongodb://test", dedupe_existing=True))
+    assert collection.count_documents({}) == 3
+    assert collection.find_one({"ip": "1.2.3.4", "service": "ssh"})["_id"] == oldest
+    assert any(index.get("unique") for index in collection.index_information().values())
@@ -0,0 +1,112 @@
+import ipaddress
+import logging
+from datetime import datetime
+
+import pytest
+from bson import ObjectId, decode
+
+from etl_connector import _TOKEN_RE, parse_ip_list
+
+
+def parsed_ips(body: bytes):
+    ips, docs = parse_ip_list(body, "ssh")
+    assert [decode(doc)["ip"] for doc in docs] == ips
+    return ips
+
+
+def reference_ips(body: bytes):
+    """The original line-by-line parser: first field of each non-comment line, checked by ipaddress."""
+    ips = []
+    for line in body.decode("ascii").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        token = line.split()[0]
+        try:
+            ipaddress.ip_address(token)
+        except ValueError:
+            continue
+        if token not in ips:
+            ips.append(token)
+    return ips
+
+
+def test_skips_comments_and_blank_lines():
+    body = b"# header\n\n1.2.3.4\n   # indented comment\n\t\n5.6.7.8\n"
+    assert parsed_ips(body) == ["1.2.3.4", "5.6.7.8"]
+
+
+def test_crlf_line_endings():
+    assert parsed_ips(b"1.2.3.4\r\n\r\n5.6.7.8\r\n") == ["1.2.3.4", "5.6.7.8"]
+
+
+def test_only_first_field_is_used():
+    assert parsed_ips(b"1.2.3.4 extra fields\n5.6.7.8\t# note\n  9.9.9.9\n") == ["1.2.3.4", "5.6.7.8", "9.9.9.9"]
+
+
+@pytest.mark.parametrize("token", [
+    b"256.1.1.1",
+    b"1.2.3.256",
+    b"01.2.3.4",
+    b"1.2.3.04",
+    b"1.2.3",
+    b"1.2.3.4.5",
+    b"1.2.3.4/24",
+    b"1.2.3.4#x",
+    b"not-an-ip",
+])
+def test_rejects_invalid_ipv4(token):
+    assert parsed_ips(token + b"\n") == []
+
+
+@pytest.mark.parametrize("token", [b"0.0.0.0", b"255.255.255.255", b"10.0.0.1", b"199.249.230.1"])
+def test_accepts_octet_boundaries(token):
+    assert parsed_ips(token + b"\n") == [token.decode()]
+    assert _TOKEN_RE.match(token).group(1) == token
+
+
+def test_ipv6():
+    body = b"::1\n2001:db8::1\n2001:db8::g\n1:2:3\n"
+    assert parsed_ips(body) == ["::1", "2001:db8::1"]
+
+
+def test_matches_reference_parser():
+    body = (b"# blocklist\n1.2.3.4\n  5.6.7.8  trailing\n01.2.3.4\n256.0.0.1\n1.2.3.4/24\n"
+            b"1.2.3.4#x\n::1\nfe80::1 x\nbad\n1.2.3.4\n\r\n10.0.0.255\r\n")
+    assert parsed_ips(body) == reference_ips(body)
+
+
+@pytest.mark.parametrize("body", [
+    b"1.2.3.4\r5.6.7.8\r",
+    b"\x0c1.2.3.4\n",
+    b"\x0b 1.2.3.4\n\t\x0c5.6.7.8 x\n",
+    b"1.2.3.4\x0b5.6.7.8\x0c9.9.9.9\n",
+    b"# c\r1.2.3.4\r\r\n#x\r\n5.6.7.8",
+])
+def test_matches_reference_parser_on_other_line_breaks(body):
+    assert parsed_ips(body) == reference_ips(body) != []
+
+
+def test_deduplicates_ips():
+    assert parsed_ips(b"1.2.3.4\n5.6.7.8\n1.2.3.4\n") == ["1.2.3.4", "5.6.7.8"]
+
+
+def test_counts_every_invalid_occurrence(caplog):
+    with caplog.at_level(logging.WARNING, logger="blocklist_etl"):
+        parsed_ips(b"bad\n1.2.3.4\nbad\n300.1.1.1\n")
+    assert "Skipped 3 invalid tokens from ssh" in caplog.text
+
+
+def test_document_fields():
+    fetched_at = datetime(2025, 1, 1)
+    run_id = ObjectId()
+    _, docs = parse_ip_list(b"1.2.3.4\n", "mail", fetched_at, run_id)
+    assert decode(docs[0]) == {
+        "ip": "1.2.3.4",
+        "service": "mail",
+        "source": "blocklist.de/lists",
+        "fetched_at": fetched_at,
+        "run_id": run_id,
+        "last_seen": fetched_at,
+        "last_run_id": run_id,
+    }
@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from pymongo import WriteConcern, errors
+
+from etl_connector import DUPLICATE_KEY_ERROR, UNACKNOWLEDGED_WRITE_CONCERN, consume_lists, parse_ip_list
+
+RUN_TS = datetime(2025, 1, 1)
+RUN_ID = ObjectId()
+URL = "https://lists.blocklist.de/lists/ssh.txt"
+VALIDATORS = {"etag": '"v1"', "last_modified": None}
+
+
+class Result:
+    def __init__(self, inserted_count, acknowledged=True):
+        self.inserted_count = inserted_count
+        self.acknowledged = acknowledged
+
+
+class FakeCollection:
+    """Stands in for the _raw collection; ``insert_error`` makes bulk_write fail like the server would."""
+
+    name = "blocklist_lists_raw"
+
+    def __init__(self, write_concern=WriteConcern(), insert_error=None, update_error=None):
+        self.write_concern = write_concern
+        self.insert_error = insert_error
+        self.update_error = update_error
+        self.updates = []
+
+    def bulk_write(self, ops, ordered, bypass_document_validation):
+        if self.insert_error:
+            raise self.insert_error
+        return Result(len(ops), self.write_concern.acknowledged)
+
+    def update_many(self, filter, update):
+        if self.update_error:
+            raise self.update_error
+        self.updates.append((filter, update))
+
+
+class FakeMeta:
+    def __init__(self):
+        self.saved = {}
+
+    def update_one(self, filter, update, upsert):
+        self.saved[filter["url"]] = update["$set"]
+
+
+def consume(collection):
+    meta = FakeMeta()
+    ips, docs = parse_ip_list(b"1.2.3.4\n5.6.7.8\n", "ssh", RUN_TS, RUN_ID)
+
+    async def main():
+        queue = asyncio.Queue()
+        await queue.put(("ssh", URL, ips, docs, VALIDATORS))
+        await queue.put(None)
+        return await consume_lists(queue, collection, meta, RUN_TS, RUN_ID)
+
+    return asyncio.run(main()), meta
+
+
+def bulk_write_error(*codes):
+    return errors.BulkWriteError({
+        "nInserted": 2 - len(codes),
+        "writeErrors": [{"index": i, "code": code, "errmsg": "x"} for i, code in enumerate(codes)],
+    })
+
+
+def test_saves_validators_once_the_list_is_stored():
+    collection = FakeCollection()
+    total, meta = consume(collection)
+    assert total == 2
+    assert meta.saved[URL] == {**VALIDATORS, "service": "ssh", "last_run_id": RUN_ID,
+                               "updated_at": meta.saved[URL]["updated_at"]}
+    # Every IP was new, so the insert already stamped last_seen
+    assert collection.updates == []
+
+
+def test_already_stored_ips_are_stamped_and_validators_saved():
+    collection = FakeCollection(insert_error=bulk_write_error(DUPLICATE_KEY_ERROR))
+    total, meta = consume(collection)
+    assert total == 1
+    assert URL in meta.saved
+    [(filter, update)] = collection.updates
+    assert filter == {"ip": {"$in": ["1.2.3.4", "5.6.7.8"]}, "service": "ssh"}
+    assert update == {"$set": {"last_seen": RUN_TS, "last_run_id": RUN_ID}}
+
+
+@pytest.mark.parametrize("collection", [
+    FakeCollection(insert_error=bulk_write_error(121)),
+    FakeCollection(insert_error=bulk_write_error(DUPLICATE_KEY_ERROR, 121)),
+    FakeCollection(insert_error=errors.AutoReconnect("connection lost")),
+    FakeCollection(insert_error=bulk_write_error(DUPLICATE_KEY_ERROR),
+                   update_error=errors.AutoReconnect("connection lost")),
+], ids=["validation-error", "partial", "network", "stamp-failed"])
+def test_failed_list_keeps_old_validators(collection):
+    _, meta = consume(collection)
+    # Saving now would make the next run skip the list (304) with documents missing
+    assert meta.saved == {}
+
+
+def test_unacknowledged_writes_never_save_validators():
+    collection = FakeCollection(write_concern=UNACKNOWLEDGED_WRITE_CONCERN)
+    total, meta = consume(collection)
+    assert total == 2
+    assert meta.saved == {}
+    assert len(collection.updates) == 1